@@ -1,6 +1,6 @@
 from .algos import PPO, SAC
 from .utils import Config
-from .networks import FeedForwardGaussianPolicy, CustomGaussianPolicy, RecurrentGaussianPolicy, FeedForwardCategoricalPolicy, DeterministicPolicy
+from .networks import FeedForwardGaussianPolicy, CustomGaussianPolicy, RecurrentGaussianPolicy, FeedForwardCategoricalPolicy, DeterministicPolicy, CompiledPolicy
 from .networks import FeedForwardQ, FeedForwardValue, CustomModelValue, CustomModelQ
 
 from .data import ReplayBuffer, MdpPathCollector
\ No newline at end of file
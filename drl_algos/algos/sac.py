@@ -1,5 +1,6 @@
 from collections import OrderedDict, namedtuple
 from typing import Tuple
+import inspect
 
 import numpy as np
 import torch
@@ -15,6 +16,9 @@ SACLosses = namedtuple(
     'policy_loss qf1_loss qf2_loss alpha_loss',
 )
 
+# Batch entries read by compute_loss
+SAC_BATCH_KEYS = ('rewards', 'terminals', 'observations', 'actions', 'next_observations')
+
 class SAC(Algorithm):
     """Class defining how to train a Soft Actor-Critic."""
 
@@ -41,10 +45,38 @@ class SAC(Algorithm):
 
             use_automatic_entropy_tuning=True,
             target_entropy=None,
+
+            # Autocast forward passes to fp16 and scale the losses, only
+            # worth it for networks larger than the usual 256x256 MLPs.
+            mixed_precision=False,
+
+            # Capture the train step in a CUDA graph and replay it for every
+            # batch that does not compute statistics. Needs a fixed batch
+            # size, an optimizer_class accepting capturable=True (e.g. Adam),
+            # policies with a learned std and torch>=1.12. Cannot be combined
+            # with BatchRLAlgorithm(async_exploration=True).
+            use_cuda_graph=False,
+            num_cuda_graph_warmup_steps=3,
     ):
         """Initialises SAC algorithm."""
         super().__init__()
 
+        if use_cuda_graph and mixed_precision:
+            raise ValueError("use_cuda_graph does not support mixed_precision.")
+        if use_cuda_graph and target_update_period != 1:
+            raise ValueError("use_cuda_graph requires target_update_period=1.")
+        if use_cuda_graph and not (
+                hasattr(torch.cuda, "graph")
+                and "capturable" in inspect.signature(optimizer_class).parameters
+        ):
+            # torch.cuda.graph exists since 1.10 but optimizers only accept
+            # capturable=True since 1.12
+            raise ValueError(
+                "use_cuda_graph requires torch>=1.12 and an optimizer_class "
+                "accepting capturable=True."
+            )
+        self._optimizer_kwargs = dict(capturable=True) if use_cuda_graph else {}
+
         # Networks
         self.policy = policy
         self.qf1 = qf1
@@ -57,8 +89,9 @@ class SAC(Algorithm):
         if self.use_automatic_entropy_tuning:
             if target_entropy is None:
                 # Use heuristic value from SAC paper
+                action_space = getattr(env, 'single_action_space', env.action_space)
                 self.target_entropy = -np.prod(
-                    env.action_space.shape).item()
+                    action_space.shape).item()
             else:
                 self.target_entropy = target_entropy
             # Create log_alpha variable and optimiser
@@ -66,26 +99,40 @@ class SAC(Algorithm):
             self.alpha_optimizer = optimizer_class(
                 [self.log_alpha],
                 lr=policy_lr,
+                **self._optimizer_kwargs,
             )
 
         # Set up optimisers
         self.policy_optimizer = optimizer_class(
             self.policy.parameters(),
             lr=policy_lr,
+            **self._optimizer_kwargs,
         )
         self.qf1_optimizer = optimizer_class(
             self.qf1.parameters(),
             lr=qf_lr,
+            **self._optimizer_kwargs,
         )
         self.qf2_optimizer = optimizer_class(
             self.qf2.parameters(),
             lr=qf_lr,
+            **self._optimizer_kwargs,
         )
 
         # Setup loss functions
         self.qf_criterion = nn.MSELoss()
         self.vf_criterion = nn.MSELoss()
 
+        # Mixed precision, the scaler is a no-op when disabled
+        self.mixed_precision = mixed_precision
+        self.scaler = torch.cuda.amp.GradScaler(enabled=mixed_precision)
+
+        # CUDA graph of the train step and the static batch it reads from
+        self.use_cuda_graph = use_cuda_graph
+        self._num_cuda_graph_warmup_steps = num_cuda_graph_warmup_steps
+        self._graph = None
+        self._static_batch = None
+
         # Hyperparameters
         self.soft_target_tau = soft_target_tau
         self.target_update_period = target_update_period
@@ -104,7 +151,10 @@ class SAC(Algorithm):
     def train(self, batch):
         self._num_train_steps += 1
         batch = utils.to_tensor_batch(batch, self.qf1.device)
-        self.train_on_batch(batch)
+        if self.use_cuda_graph and not self._need_to_update_eval_statistics:
+            self.train_on_batch_graphed(batch)
+        else:
+            self.train_on_batch(batch)
 
     def get_diagnostics(self):
         stats = OrderedDict([
@@ -115,26 +165,11 @@ class SAC(Algorithm):
 
     def train_on_batch(self, batch):
         gt.blank_stamp()
-        losses, eval_stats = self.compute_loss(batch,
-            skip_statistics=not self._need_to_update_eval_statistics
-        )
-
-        if self.use_automatic_entropy_tuning:
-            self.alpha_optimizer.zero_grad()
-            losses.alpha_loss.backward()
-            self.alpha_optimizer.step()
-
-        self.policy_optimizer.zero_grad()
-        losses.policy_loss.backward()
-        self.policy_optimizer.step()
-
-        self.qf1_optimizer.zero_grad()
-        losses.qf1_loss.backward()
-        self.qf1_optimizer.step()
-
-        self.qf2_optimizer.zero_grad()
-        losses.qf2_loss.backward()
-        self.qf2_optimizer.step()
+        with torch.cuda.amp.autocast(enabled=self.mixed_precision):
+            losses, eval_stats = self.compute_loss(batch,
+                skip_statistics=not self._need_to_update_eval_statistics
+            )
+        self.optimise(losses)
 
         self._n_train_steps_total += 1
 
@@ -145,6 +180,64 @@ class SAC(Algorithm):
             self._need_to_update_eval_statistics = False
         gt.stamp('sac training', unique=False)
 
+    def optimise(self, losses):
+        # Gradients are set to None rather than zeroed so that backward
+        # allocates them inside the graph pool when capturing.
+        if self.use_automatic_entropy_tuning:
+            self.alpha_optimizer.zero_grad(set_to_none=True)
+            self.scaler.scale(losses.alpha_loss).backward()
+            self.scaler.step(self.alpha_optimizer)
+
+        self.policy_optimizer.zero_grad(set_to_none=True)
+        self.scaler.scale(losses.policy_loss).backward()
+        self.scaler.step(self.policy_optimizer)
+
+        self.qf1_optimizer.zero_grad(set_to_none=True)
+        self.scaler.scale(losses.qf1_loss).backward()
+        self.scaler.step(self.qf1_optimizer)
+
+        self.qf2_optimizer.zero_grad(set_to_none=True)
+        self.scaler.scale(losses.qf2_loss).backward()
+        self.scaler.step(self.qf2_optimizer)
+
+        self.scaler.update()
+
+    def train_on_batch_graphed(self, batch):
+        """Runs the train step by replaying a captured CUDA graph."""
+        gt.blank_stamp()
+        if self._graph is None and self._num_cuda_graph_warmup_steps > 0:
+            # Warm up on a side stream, this also creates optimizer states
+            self._num_cuda_graph_warmup_steps -= 1
+            stream = torch.cuda.Stream()
+            stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(stream):
+                self._graphed_step(batch)
+            torch.cuda.current_stream().wait_stream(stream)
+        else:
+            if self._graph is None:
+                self._capture_graph(batch)
+            for k, static in self._static_batch.items():
+                static.copy_(batch[k])
+            self._graph.replay()
+        self._n_train_steps_total += 1
+        gt.stamp('sac training', unique=False)
+
+    def _graphed_step(self, batch):
+        losses, _ = self.compute_loss(batch, skip_statistics=True)
+        self.optimise(losses)
+        self.update_target_networks()
+
+    def _capture_graph(self, batch):
+        self._static_batch = {k: batch[k].clone() for k in SAC_BATCH_KEYS}
+        # The policy loss also backpropagates into the Q networks, drop every
+        # grad left by the eager steps so the capture allocates all of them
+        # from the graph pool instead of accumulating into eager buffers.
+        for optimizer in self.get_optimizers():
+            optimizer.zero_grad(set_to_none=True)
+        self._graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(self._graph):
+            self._graphed_step(self._static_batch)
+
     def compute_loss(self, batch, skip_statistics=False):
         rewards = batch['rewards']
         terminals = batch['terminals']
@@ -235,13 +328,22 @@ class SAC(Algorithm):
 
     def try_update_target_networks(self):
         if self._n_train_steps_total % self.target_update_period == 0:
-            utils.soft_update(self.qf1, self.target_qf1, self.soft_target_tau)
-            utils.soft_update(self.qf2, self.target_qf2, self.soft_target_tau)
+            self.update_target_networks()
+
+    def update_target_networks(self):
+        utils.soft_update_many(
+            [(self.qf1, self.target_qf1), (self.qf2, self.target_qf2)],
+            self.soft_target_tau,
+        )
 
     def end_epoch(self, epoch):
         self._need_to_update_eval_statistics = True
 
     def set_device(self, device):
+        # A captured graph holds the old device addresses
+        self._graph = None
+        self._static_batch = None
+
         # Move networks to device
         for network in self.get_networks():
             network.to(device)
@@ -252,6 +354,7 @@ class SAC(Algorithm):
             self.alpha_optimizer = type(self.alpha_optimizer)(
                 [self.log_alpha],
                 lr=self.alpha_optimizer.param_groups[0]['lr'],
+                **self._optimizer_kwargs,
             )
 
     def get_networks(self):
@@ -264,12 +367,14 @@ class SAC(Algorithm):
         ]
 
     def get_optimizers(self):
-        return [
-            self.alpha_optimizer,
+        optimizers = [
             self.qf1_optimizer,
             self.qf2_optimizer,
             self.policy_optimizer,
         ]
+        if self.use_automatic_entropy_tuning:
+            optimizers.insert(0, self.alpha_optimizer)
+        return optimizers
 
     def get_snapshot(self):
         return dict(
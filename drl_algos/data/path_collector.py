@@ -3,7 +3,7 @@ from collections import deque, OrderedDict
 import numpy as np
 
 from drl_algos.data import ReplayBuffer
-from drl_algos.data.rollouts import rollout
+from drl_algos.data.rollouts import rollout, vec_rollout
 from drl_algos.utils import utils
 
 
@@ -27,12 +27,20 @@ class MdpPathCollector(object):
         self._epoch_paths = deque(maxlen=self._max_num_epoch_paths_saved)
         self._render = render
         self._render_kwargs = render_kwargs
+        # Vector envs are stepped in lockstep, one path per sub-environment
+        self._num_envs = getattr(env, 'num_envs', None)
+        if self._num_envs is not None and rollout_fn is rollout:
+            rollout_fn = vec_rollout
         self._rollout_fn = rollout_fn
 
         self._num_steps_total = 0
         self._num_paths_total = 0
 
-        self._save_env_in_snapshot = save_env_in_snapshot
+        # Vector envs are usually built from lambdas, which cannot be
+        # pickled, so they are never saved with the snapshot
+        self._save_env_in_snapshot = (
+            save_env_in_snapshot and self._num_envs is None
+        )
 
     def collect_new_paths(
             self,
@@ -42,27 +50,42 @@ class MdpPathCollector(object):
     ):
         paths = []
         num_steps_collected = 0
-        while num_steps_collected < num_steps:
+        done = False
+        while num_steps_collected < num_steps and not done:
+            steps_left = num_steps - num_steps_collected
+            if self._num_envs is not None:
+                # Every sub-environment takes a step per iteration
+                steps_left = -(-steps_left // self._num_envs)
             max_path_length_this_loop = min(  # Do not go over num_steps
                 max_path_length,
-                num_steps - num_steps_collected,
+                steps_left,
             )
-            path = self._rollout_fn(
+            new_paths = self._rollout_fn(
                 self._env,
                 self._policy,
                 max_path_length=max_path_length_this_loop,
                 render=self._render,
                 render_kwargs=self._render_kwargs,
             )
-            path_len = len(path['actions'])
-            if (
-                    path_len != max_path_length
-                    and not path['terminals'][-1]
-                    and discard_incomplete_paths
-            ):
-                break
-            num_steps_collected += path_len
-            paths.append(path)
+            if self._num_envs is None:
+                new_paths = [new_paths]
+            for path in new_paths:
+                path_len = len(path['actions'])
+                if num_steps_collected + path_len > num_steps:
+                    # Vector envs can overshoot num_steps on the last rollout
+                    path_len = num_steps - num_steps_collected
+                    path = {k: v[:path_len] for k, v in path.items()}
+                if path_len == 0:
+                    break
+                if (
+                        path_len != max_path_length
+                        and not path['terminals'][-1]
+                        and discard_incomplete_paths
+                ):
+                    done = True
+                    break
+                num_steps_collected += path_len
+                paths.append(path)
 
         self._num_paths_total += len(paths)
         self._num_steps_total += num_steps_collected
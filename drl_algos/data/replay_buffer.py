@@ -3,6 +3,7 @@ import warnings
 
 from gym.spaces import Discrete, Box
 import numpy as np
+import torch
 
 
 def get_dim(space):
@@ -26,7 +27,17 @@ class ReplayBuffer(object):
         env,
         env_info_sizes = None,
         replace = True,
+        device = None,
+        device_memory_fraction = 0.5,
     ):
+        """
+            :param device: If set, the buffer is stored as float32 torch
+                tensors resident on this device and random_batch returns
+                tensors already on it. If None, numpy arrays are used.
+            :param device_memory_fraction: Largest fraction of the device
+                memory the buffer may take up before it falls back to host
+                numpy storage.
+        """
         self.env = env
 
         if env_info_sizes is None:
@@ -35,28 +46,46 @@ class ReplayBuffer(object):
             else:
                 env_info_sizes = dict()
 
-        self._observation_dim = get_dim(env.observation_space)
-        self._action_space = env.action_space
-        self._action_dim = get_dim(env.action_space)
+        # Vector envs batch their spaces, store single transitions
+        observation_space = getattr(env, 'single_observation_space', env.observation_space)
+        self._observation_dim = get_dim(observation_space)
+        self._action_space = getattr(env, 'single_action_space', env.action_space)
+        self._action_dim = get_dim(self._action_space)
         self._max_replay_buffer_size = max_replay_buffer_size
-        self._observations = np.zeros((max_replay_buffer_size,
-                                       self._observation_dim))
+
+        row_dim = (2 * self._observation_dim + self._action_dim + 2
+                   + sum(env_info_sizes.values()))
+        self._device = self._check_device(
+            device,
+            4 * row_dim * max_replay_buffer_size,
+            device_memory_fraction,
+        )
+        if self._device is not None:
+            # On device every column is a slice of one contiguous row major
+            # tensor so sampling a batch is a single index_select.
+            self._data = torch.zeros((max_replay_buffer_size, row_dim),
+                                     dtype=torch.float32, device=self._device)
+            self._col_slices = OrderedDict()
+            self._num_cols = 0
+
+        self._observations = self._column('observations',
+                                          self._observation_dim)
         # It's a bit memory inefficient to save the observations twice,
         # but it makes the code *much* easier since you no longer have to
         # worry about termination conditions.
-        self._next_obs = np.zeros((max_replay_buffer_size,
-                                   self._observation_dim))
-        self._actions = np.zeros((max_replay_buffer_size, self._action_dim))
+        self._next_obs = self._column('next_observations',
+                                      self._observation_dim)
+        self._actions = self._column('actions', self._action_dim)
         # Make everything a 2D np array to make it easier for other code to
         # reason about the shape of the data
-        self._rewards = np.zeros((max_replay_buffer_size, 1))
+        self._rewards = self._column('rewards', 1)
         # self._terminals[i] = a terminal was received at time i
-        self._terminals = np.zeros((max_replay_buffer_size, 1), dtype='uint8')
+        self._terminals = self._column('terminals', 1, dtype='uint8')
         # Define self._env_infos[key][i] to be the return value of env_info[key]
         # at time i
         self._env_infos = {}
         for key, size in env_info_sizes.items():
-            self._env_infos[key] = np.zeros((max_replay_buffer_size, size))
+            self._env_infos[key] = self._column(key, size)
         self._env_info_keys = env_info_sizes.keys()
 
         self._replace = replace
@@ -64,6 +93,31 @@ class ReplayBuffer(object):
         self._top = 0
         self._size = 0
 
+    @staticmethod
+    def _check_device(device, num_bytes, device_memory_fraction):
+        if device is None or torch.device(device).type != "cuda":
+            return device
+        budget = (torch.cuda.get_device_properties(device).total_memory
+                  * device_memory_fraction)
+        if num_bytes > budget:
+            warnings.warn('Replay buffer needs {} bytes which exceeds the device budget of {} bytes, storing it in host memory instead.'.format(num_bytes, int(budget)))
+            return None
+        return device
+
+    def _column(self, name, width, dtype=None):
+        if self._device is None:
+            return np.zeros((self._max_replay_buffer_size, width), dtype=dtype)
+        assert name not in self._col_slices
+        col_slice = slice(self._num_cols, self._num_cols + width)
+        self._num_cols += width
+        self._col_slices[name] = col_slice
+        return self._data[:, col_slice]
+
+    def _to_storage(self, value):
+        if self._device is None:
+            return value
+        return torch.as_tensor(value, dtype=torch.float32, device=self._device)
+
     def add_path(self, path):
         """
         Add a path to the replay buffer.
@@ -73,6 +127,12 @@ class ReplayBuffer(object):
         It's assumed that this function handles the episode termination.
         :param path: Dict like one outputted by rlkit.samplers.util.rollout
         """
+        path_len = len(path["actions"])
+        if self._device is not None and 0 < path_len <= self._max_replay_buffer_size:
+            self._add_path_to_device(path, path_len)
+            self.terminate_episode()
+            return
+
         for i, (
                 obs,
                 action,
@@ -101,6 +161,36 @@ class ReplayBuffer(object):
             )
         self.terminate_episode()
 
+    def _add_path_to_device(self, path, path_len):
+        # Lay the whole path out on the host in the row layout of _data so
+        # it goes to the device in one copy and one or two slice writes.
+        if isinstance(self._action_space, Discrete):
+            actions = np.eye(self._action_dim)[np.asarray(path["actions"]).reshape(-1)]
+        else:
+            actions = path["actions"]
+        columns = dict(
+            observations=path["observations"],
+            next_observations=path["next_observations"],
+            actions=actions,
+            rewards=path["rewards"],
+            terminals=path["terminals"],
+        )
+        for key in self._env_info_keys:
+            columns[key] = [env_info[key] for env_info in path["env_infos"]]
+
+        rows = np.empty((path_len, self._num_cols), dtype=np.float32)
+        for key, col_slice in self._col_slices.items():
+            rows[:, col_slice] = np.asarray(columns[key]).reshape(path_len, -1)
+        rows = torch.as_tensor(rows, device=self._device)
+
+        # Split the write in two when the path wraps around the buffer end
+        first = min(path_len, self._max_replay_buffer_size - self._top)
+        self._data[self._top:self._top + first] = rows[:first]
+        self._data[:path_len - first] = rows[first:]
+
+        self._top = (self._top + path_len) % self._max_replay_buffer_size
+        self._size = min(self._size + path_len, self._max_replay_buffer_size)
+
     def add_paths(self, paths):
         for path in paths:
             self.add_path(path)
@@ -113,14 +203,14 @@ class ReplayBuffer(object):
         else:
            new_action = action
 
-        self._observations[self._top] = observation
-        self._actions[self._top] = new_action
-        self._rewards[self._top] = reward
-        self._terminals[self._top] = terminal
-        self._next_obs[self._top] = next_observation
+        self._observations[self._top] = self._to_storage(observation)
+        self._actions[self._top] = self._to_storage(new_action)
+        self._rewards[self._top] = self._to_storage(reward)
+        self._terminals[self._top] = self._to_storage(terminal)
+        self._next_obs[self._top] = self._to_storage(next_observation)
 
         for key in self._env_info_keys:
-            self._env_infos[key][self._top] = env_info[key]
+            self._env_infos[key][self._top] = self._to_storage(env_info[key])
         self._advance()
 
     def terminate_episode(self):
@@ -132,9 +222,11 @@ class ReplayBuffer(object):
             self._size += 1
 
     def random_batch(self, batch_size):
-        indices = np.random.choice(self._size, size=batch_size, replace=self._replace or self._size < batch_size)
         if not self._replace and self._size < batch_size:
             warnings.warn('Replace was set to false, but is temporarily set to true because batch size is larger than current size of replay.')
+        if self._device is not None:
+            return self._random_device_batch(batch_size)
+        indices = np.random.choice(self._size, size=batch_size, replace=self._replace or self._size < batch_size)
         batch = dict(
             observations=self._observations[indices],
             actions=self._actions[indices],
@@ -147,6 +239,14 @@ class ReplayBuffer(object):
             batch[key] = self._env_infos[key][indices]
         return batch
 
+    def _random_device_batch(self, batch_size):
+        if self._replace or self._size < batch_size:
+            indices = torch.randint(0, self._size, (batch_size,), device=self._device)
+        else:
+            indices = torch.randperm(self._size, device=self._device)[:batch_size]
+        rows = self._data.index_select(0, indices)
+        return {k: rows[:, s] for k, s in self._col_slices.items()}
+
     def rebuild_env_info_dict(self, idx):
         return {
             key: self._env_infos[key][idx]
@@ -1,3 +1,4 @@
+import collections
 import copy
 
 import numpy as np
@@ -58,6 +59,106 @@ def rollout(
         if d:
             break
         o = next_o
+    return _pack_path(
+        observations,
+        actions,
+        rewards,
+        next_observations,
+        terminals,
+        agent_infos,
+        env_infos,
+        raw_obs,
+        raw_next_obs,
+        return_dict_obs,
+    )
+
+
+def vec_rollout(
+        env,
+        agent,
+        max_path_length=np.inf,
+        render=False,
+        render_kwargs=None,
+):
+    """
+        Steps every sub-environment of a gym VectorEnv in lockstep with a
+        single batched policy call per step.
+
+        Episodes that terminate need the vector env to provide
+        info['terminal_observation'], which gym 0.18 does not, envs that
+        never terminate (e.g. Pendulum without its TimeLimit) work as is.
+
+        :return: A list with one path per sub-environment, each path ends
+            at the first terminal of its sub-environment or after
+            max_path_length steps.
+    """
+    if render_kwargs is None:
+        render_kwargs = {}
+    paths = [collections.defaultdict(list) for _ in range(env.num_envs)]
+    active = np.ones(env.num_envs, dtype=bool)
+    path_length = 0
+    agent.reset()
+    o = env.reset()
+    if render:
+        env.render(**render_kwargs)
+    while path_length < max_path_length and active.any():
+        a, agent_info = agent.get_actions(o)
+        next_o, r, d, env_infos = env.step(copy.deepcopy(a))
+        if render:
+            env.render(**render_kwargs)
+        for i in np.flatnonzero(active):
+            path = paths[i]
+            # Vector envs reset finished sub-environments straight away so
+            # next_o[i] is already the first observation of a new episode,
+            # the real last observation has to come from the env info.
+            next_o_i = next_o[i]
+            if d[i]:
+                if 'terminal_observation' not in env_infos[i]:
+                    raise ValueError(
+                        "vec_rollout needs vector envs that report "
+                        "info['terminal_observation'] for finished episodes, "
+                        "gym 0.18's SyncVectorEnv does not."
+                    )
+                next_o_i = env_infos[i]['terminal_observation']
+            path['observations'].append(o[i])
+            path['rewards'].append(r[i])
+            path['terminals'].append(d[i])
+            path['actions'].append(a[i])
+            path['next_observations'].append(next_o_i)
+            path['agent_infos'].append(agent_info)
+            path['env_infos'].append(env_infos[i])
+            if d[i]:
+                active[i] = False
+        path_length += 1
+        o = next_o
+    return [
+        _pack_path(
+            path['observations'],
+            path['actions'],
+            path['rewards'],
+            path['next_observations'],
+            path['terminals'],
+            path['agent_infos'],
+            path['env_infos'],
+            path['observations'],
+            path['next_observations'],
+        )
+        for path in paths
+    ]
+
+
+def _pack_path(
+        observations,
+        actions,
+        rewards,
+        next_observations,
+        terminals,
+        agent_infos,
+        env_infos,
+        raw_obs,
+        raw_next_obs,
+        return_dict_obs=False,
+):
     actions = np.array(actions)
     if len(actions.shape) == 1:
         actions = np.expand_dims(actions, 1)
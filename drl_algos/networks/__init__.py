@@ -1,2 +1,2 @@
 from drl_algos.networks.critic import FeedForwardQ, FeedForwardValue, RecurrentQ, RecurrentValue, CustomModelQ, CustomModelValue
-from drl_algos.networks.policies import FeedForwardGaussianPolicy, RecurrentGaussianPolicy, CustomGaussianPolicy, FeedForwardCategoricalPolicy, DeterministicPolicy
\ No newline at end of file
+from drl_algos.networks.policies import FeedForwardGaussianPolicy, RecurrentGaussianPolicy, CustomGaussianPolicy, FeedForwardCategoricalPolicy, DeterministicPolicy, CompiledPolicy
\ No newline at end of file
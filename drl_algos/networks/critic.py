@@ -17,8 +17,9 @@ class Base_Q(Network):
         self.q_fn = nn.Linear(self.base.latent_size, 1)
 
     def forward(self, *inputs):
-        inputs = utils.cat(inputs, dim=1)
-        inputs = utils.to_tensor(inputs, self.device)
+        # Inputs may be numpy arrays or tensors, converting each one first
+        # lets the concatenation always stay on the device.
+        inputs = utils.cat_torch([utils.to_tensor(x, self.device) for x in inputs], dim=1)
         latent_features = self.base(inputs)
         return self.q_fn(latent_features)
 
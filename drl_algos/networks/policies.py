@@ -1,3 +1,5 @@
+import warnings
+
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -35,6 +37,13 @@ class StochasticPolicy(Policy):
             return actions, {}
         return actions[0, :], {}
 
+    def get_actions(self, obs):
+        """Batched get_action for a stack of observations."""
+        obs = utils.to_tensor(obs, self.device)
+        dist = self(obs)
+        actions = utils.to_numpy(dist.sample())
+        return actions, {}
+
 
 class DeterministicPolicy(StochasticPolicy):
 
@@ -48,6 +57,58 @@ class DeterministicPolicy(StochasticPolicy):
         dist = self._policy(*args, **kwargs)
         return Delta(dist.mle_estimate())
 
+class CompiledPolicy(StochasticPolicy):
+    """
+        Wraps a policy and runs its forward pass through torch.compile,
+        the wrapped policy's parameters are shared and not copied. Meant for
+        the exploration path collector where every step is a tiny forward
+        pass dominated by launch overhead. Falls back to the eager policy on
+        PyTorch versions without torch.compile.
+
+        :param policy: Policy to compile.
+        :param mode: torch.compile mode, "reduce-overhead" uses CUDA graphs.
+    """
+
+    def __init__(self, policy, mode="reduce-overhead"):
+        super().__init__()
+        self._policy = policy
+        self._mode = mode
+        self.is_continuous = self._policy.is_continuous
+        # Compiled on the first forward pass, see __getstate__
+        self._compiled_forward = None
+        if not hasattr(torch, "compile"):
+            warnings.warn("torch.compile is not available, CompiledPolicy runs the policy eagerly.")
+
+    def __getstate__(self):
+        # The compiled callable can neither be pickled nor deep copied and is
+        # bound to this policy, a restored copy compiles its own forward.
+        state = self.__dict__.copy()
+        state["_compiled_forward"] = None
+        return state
+
+    @property
+    def device(self):
+        return self._policy.device
+
+    @device.setter
+    def device(self, device):
+        # Network.__init__ sets a device before the policy is wrapped
+        if "_policy" in self._modules:
+            self._policy.device = device
+
+    def forward(self, *args, **kwargs):
+        if self._compiled_forward is None:
+            # Compile the bound forward rather than the module so the
+            # compiled callable is not registered as a second child module.
+            if hasattr(torch, "compile"):
+                self._compiled_forward = torch.compile(self._policy.forward, mode=self._mode)
+            else:
+                self._compiled_forward = self._policy.forward
+        return self._compiled_forward(*args, **kwargs)
+
+    def reset(self):
+        self._policy.reset()
+
 class GaussianPolicy(StochasticPolicy):
 
     def __init__(self, base, action_dim, std, dist, init_w=1e-3):
@@ -107,6 +168,13 @@ class CategoricalPolicy(StochasticPolicy):
         logits = self.logits(features)
         return self.dist(logits)
 
+    def get_actions(self, obs):
+        obs = utils.to_tensor(obs, self.device)
+        dist = self(obs)
+        # Discrete.sample only returns the first action of the batch
+        actions = utils.to_numpy(dist.categorical.sample())
+        return actions, {}
+
     def logprob(self, action, logits):
         dist = self.dist(logits)
         log_prob = dist.log_prob(action)
@@ -1,4 +1,7 @@
 import collections
+import copy
+import queue
+import threading
 from collections import OrderedDict
 
 import numpy as np
@@ -160,6 +163,8 @@ class BatchRLAlgorithm(Trainer):
             num_trains_per_train_loop,
             num_train_loops_per_epoch=1,
             min_num_steps_before_training=0,
+            async_exploration=False,
+            policy_sync_period=50,
     ):
         super().__init__(
             algorithm=algorithm,
@@ -179,7 +184,26 @@ class BatchRLAlgorithm(Trainer):
         self.num_expl_steps_per_train_loop = num_expl_steps_per_train_loop
         self.min_num_steps_before_training = min_num_steps_before_training
 
+        if async_exploration and getattr(algorithm, 'use_cuda_graph', False):
+            # The worker's CUDA work would invalidate the graph capture
+            raise ValueError("async_exploration cannot be used with an algorithm capturing CUDA graphs.")
+
+        # Collect exploration paths on a worker thread while training, the
+        # worker acts with a copy of the policy. Every policy_sync_period
+        # gradient steps the trained weights are published and the copy
+        # loads them before its next action, also in the middle of a path.
+        self.async_exploration = async_exploration
+        self.policy_sync_period = policy_sync_period
+        self._expl_policy = None
+        self._source_policy = None
+        self._policy_lock = threading.Lock()
+        self._pending_policy_state = None
+        self._worker_error = None
+
     def _train(self):
+        if self.async_exploration and self._expl_policy is None:
+            self._init_async_exploration()
+
         if self.min_num_steps_before_training > 0:
             init_expl_paths = self.expl_path_collector.collect_new_paths(
                 self.max_path_length,
@@ -201,6 +225,10 @@ class BatchRLAlgorithm(Trainer):
             gt.stamp('evaluation sampling')
 
             for _ in range(self.num_train_loops_per_epoch):
+                if self.async_exploration:
+                    self._async_train_loop()
+                    continue
+
                 new_expl_paths = self.expl_path_collector.collect_new_paths(
                     self.max_path_length,
                     self.num_expl_steps_per_train_loop,
@@ -221,14 +249,131 @@ class BatchRLAlgorithm(Trainer):
 
             self._end_epoch(epoch)
 
+    def _init_async_exploration(self):
+        # Weights are published from the collector's original policy so the
+        # state dict keys match the copy even for wrapped policies.
+        self._source_policy = self.expl_path_collector._policy
+        self._expl_policy = copy.deepcopy(self._source_policy)
+        self.expl_path_collector._policy = _SyncedPolicy(
+            self._expl_policy,
+            self._sync_expl_policy,
+        )
+
+    def _async_train_loop(self):
+        self._publish_policy()
+        paths = queue.Queue()
+        worker = threading.Thread(
+            target=self._collect_expl_paths,
+            args=(paths,),
+            daemon=True,
+        )
+        worker.start()
+
+        self.training_mode(True)
+        for step in range(self.num_trains_per_train_loop):
+            self._add_queued_paths(paths)
+            # Nothing to sample from yet, wait for the first path
+            while (self.replay_buffer.num_steps_can_sample() == 0
+                   and worker.is_alive()):
+                worker.join(timeout=1e-3)
+                self._add_queued_paths(paths)
+            if self._worker_error is not None:
+                break
+            train_data = self.replay_buffer.random_batch(self.batch_size)
+            self.algo.train(train_data)
+            if (step + 1) % self.policy_sync_period == 0:
+                self._publish_policy()
+        gt.stamp('training', unique=False)
+        self.training_mode(False)
+
+        worker.join()
+        if self._worker_error is not None:
+            error, self._worker_error = self._worker_error, None
+            raise error
+        gt.stamp('exploration sampling', unique=False)
+
+        self._add_queued_paths(paths)
+        gt.stamp('data storing', unique=False)
+
+    def _collect_expl_paths(self, paths):
+        try:
+            num_steps = 0
+            while num_steps < self.num_expl_steps_per_train_loop:
+                new_expl_paths = self.expl_path_collector.collect_new_paths(
+                    self.max_path_length,
+                    min(self.max_path_length,
+                        self.num_expl_steps_per_train_loop - num_steps),
+                    discard_incomplete_paths=False,
+                )
+                for path in new_expl_paths:
+                    num_steps += len(path['actions'])
+                    paths.put(path)
+        except Exception as error:
+            self._worker_error = error
+
+    def _add_queued_paths(self, paths):
+        while True:
+            try:
+                path = paths.get_nowait()
+            except queue.Empty:
+                return
+            self.replay_buffer.add_path(path)
+
+    def _publish_policy(self):
+        state = {
+            k: v.detach().clone()
+            for k, v in self._source_policy.state_dict().items()
+        }
+        with self._policy_lock:
+            self._pending_policy_state = state
+
+    def _sync_expl_policy(self):
+        # Cheap unlocked check, this runs before every exploration action
+        if self._pending_policy_state is None:
+            return
+        with self._policy_lock:
+            state, self._pending_policy_state = self._pending_policy_state, None
+        if state is not None:
+            self._expl_policy.load_state_dict(state)
+
+    def _get_snapshot(self):
+        snapshot = super()._get_snapshot()
+        if self._source_policy is not None:
+            # Save the trained policy rather than the worker's lagged copy
+            snapshot['exploration/policy'] = self._source_policy
+        return snapshot
+
     def to(self, device):
         self.algo.set_device(device)
         self.eval_path_collector._policy.to(device)
+        if self._expl_policy is not None:
+            self._expl_policy.to(device)
 
     def training_mode(self, mode):
         for net in self.algo.get_networks():
             net.train(mode)
 
+class _SyncedPolicy(object):
+    """
+        Exploration policy used by the async worker, loads newly published
+        weights through sync_fn before every action.
+    """
+
+    def __init__(self, policy, sync_fn):
+        self._policy = policy
+        self._sync_fn = sync_fn
+
+    def get_action(self, *args, **kwargs):
+        self._sync_fn()
+        return self._policy.get_action(*args, **kwargs)
+
+    def get_actions(self, *args, **kwargs):
+        self._sync_fn()
+        return self._policy.get_actions(*args, **kwargs)
+
+    def reset(self):
+        self._policy.reset()
+
 class OnPolicyAlgorithm(Trainer):
     def __init__(
             self,
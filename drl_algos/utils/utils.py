@@ -1,14 +1,18 @@
 import os
 import json
+import threading
 import torch
-import datetime
 import numpy as np
-import dateutil.tz
 import os.path as osp
 
 from collections import OrderedDict
+from weakref import WeakKeyDictionary
 from numbers import Number
-from drl_algos.utils.logging import logger
+
+try:
+    import numba
+except ImportError:
+    numba = None
 
 LOCAL_LOG_DIR = "experiments"
 
@@ -36,34 +40,169 @@ def compute_discounted_returns(rewards, dones, gamma):
     return np.array(returns, dtype=np.float32)
 
 
+# Every thread stages its H2D copies through its own page-locked host
+# buffers, kept in an LRU keyed on the shape of the array being staged and
+# each paired with the event of its last copy.
+PINNED_CACHE_SIZE = 16
+_pinned_state = threading.local()
+
+
+def _get_pinned_cache():
+    cache = getattr(_pinned_state, "cache", None)
+    if cache is None:
+        cache = _pinned_state.cache = OrderedDict()
+    return cache
+
+
+def _get_transfer_stream():
+    stream = getattr(_pinned_state, "transfer_stream", None)
+    if stream is None:
+        stream = _pinned_state.transfer_stream = torch.cuda.Stream()
+    return stream
+
+
+def _pinned_to_device(np_array, device):
+    cache = _get_pinned_cache()
+    entry = cache.pop(np_array.shape, None)
+    if entry is None:
+        if len(cache) >= PINNED_CACHE_SIZE:
+            _, (_, evicted_copy_done) = cache.popitem(last=False)
+            # Let the last transfer out of it finish before it is freed
+            evicted_copy_done.synchronize()
+        entry = (
+            torch.empty(np_array.shape, dtype=torch.float32, pin_memory=True),
+            torch.cuda.Event(),
+        )
+    cache[np_array.shape] = entry
+    buf, copy_done = entry
+    # The previous non blocking copy out of this buffer must finish before
+    # it is overwritten.
+    copy_done.synchronize()
+    buf.copy_(torch.from_numpy(np_array))
+    tensor = buf.to(device, non_blocking=True)
+    copy_done.record()
+    return tensor
+
+
 def to_tensor(np_array, device="cpu"):
     if isinstance(np_array, np.ndarray):
+        if torch.device(device).type == "cuda":
+            return _pinned_to_device(np_array, device)
         return torch.from_numpy(np_array).float().to(device)
     return np_array.float().to(device)
 
 
 def to_numpy(data):
     if isinstance(data, tuple):
-        return tuple(to_numpy(x) for x in data)
-    if isinstance(data, torch.autograd.Variable):
-        return data.to('cpu').detach().numpy()
+        return _tuple_to_numpy(data)
+    if isinstance(data, torch.Tensor):
+        return data.detach().to('cpu').numpy()
     return data
 
 
+def _tuple_to_numpy(data):
+    # Queue every device to host copy before waiting on any of them so a
+    # tuple of CUDA tensors costs one synchronisation instead of one each.
+    devices = set()
+    host = []
+    for x in data:
+        if isinstance(x, torch.Tensor) and x.is_cuda:
+            buf = torch.empty(x.shape, dtype=x.dtype, pin_memory=True)
+            buf.copy_(x.detach(), non_blocking=True)
+            devices.add(x.device)
+            host.append(buf)
+        else:
+            host.append(x)
+    for device in devices:
+        torch.cuda.current_stream(device).synchronize()
+    return tuple(to_numpy(x) for x in host)
+
+
 def to_tensor_batch(batch, device="cpu"):
-    if isinstance(batch, dict):
-        return {
-            k: to_tensor(x, device)
-            for k, x in _filter_batch(batch)
-            if x.dtype != np.dtype('O')  # ignore object (e.g. dictionaries)
-        }
+    if not isinstance(batch, dict):
+        return to_tensor(batch, device)
+    if not batch:
+        return {}
+    # Only the keys and the container type of the columns are looked at per
+    # batch, dtypes are inspected once when a converter is built.
+    schema = (device, tuple(batch), type(next(iter(batch.values()))))
+    converter = _schema_cache.get(schema)
+    if converter is None:
+        converter = _schema_cache[schema] = _build_batch_converter(batch, device)
+    return converter(batch)
+
+
+# Batch converters keyed on the target device, the keys of the batches they
+# convert and whether those hold arrays or tensors, built once per schema by
+# _build_batch_converter. Assumes a given set of keys keeps its dtypes, as
+# is the case for batches sampled from the same buffer.
+_schema_cache = {}
+
+
+def _column_converter(x, device):
+    """Returns a function moving a single batch column to device."""
+    if isinstance(x, torch.Tensor):
+        return lambda v: v.to(device=device, dtype=torch.float32)
+    if torch.device(device).type == "cuda":
+        host_to_device = lambda v: _pinned_to_device(v, device)
     else:
-        to_tensor(batch, device)
+        host_to_device = lambda v: torch.from_numpy(v).float().to(device)
+    if x.dtype == np.bool_:
+        # Zero copy, the uint8 values are upcast during the float copy
+        return lambda v: host_to_device(v.view(np.uint8))
+    return host_to_device
+
+
+def _build_batch_converter(batch, device):
+    columns = [
+        (k, _column_converter(x, device))
+        for k, x in batch.items()
+        if not _is_object_array(x)  # ignore object (e.g. dictionaries)
+    ]
+
+    # Generate a straight-line converter for this schema so a call does
+    # no dict iteration or dispatch, e.g. for two columns:
+    #   def convert(batch):
+    #       return {'rewards': _c0(batch['rewards']), 'terminals': ...}
+    namespace = {"_c{}".format(i): fn for i, (_, fn) in enumerate(columns)}
+    entries = ", ".join(
+        "{0!r}: _c{1}(batch[{0!r}])".format(k, i)
+        for i, (k, _) in enumerate(columns)
+    )
+    exec("def convert(batch):\n    return {" + entries + "}\n", namespace)
+    convert = namespace["convert"]
+
+    on_host = any(isinstance(x, np.ndarray) for x in batch.values())
+    if not on_host or torch.device(device).type != "cuda":
+        return convert
+
+    def convert_on_transfer_stream(batch):
+        # Issue every copy on a side stream so the transfers overlap with
+        # whatever is still running on the compute stream.
+        transfer_stream = _get_transfer_stream()
+        with torch.cuda.stream(transfer_stream):
+            tensors = convert(batch)
+        compute_stream = torch.cuda.current_stream()
+        compute_stream.wait_stream(transfer_stream)
+        for tensor in tensors.values():
+            tensor.record_stream(compute_stream)
+        return tensors
+
+    return convert_on_transfer_stream
 
 
 def cat(data, dim=1):
-    if isinstance(data[0], torch.autograd.Variable):
-        return torch.cat(data, dim=dim)
+    if isinstance(data[0], torch.Tensor):
+        return cat_torch(data, dim)
+    return cat_np(data, dim)
+
+
+# Monomorphic versions of cat for call sites that know their input type
+def cat_torch(data, dim=1):
+    return torch.cat(data, dim=dim)
+
+
+def cat_np(data, dim=1):
     return np.concatenate(data, axis=dim)
 
 
@@ -83,13 +222,57 @@ def fanin_init(tensor):
     return tensor.data.uniform_(-bound, bound)
 
 
+@torch.jit.script
+def _polyak(target: torch.Tensor, source: torch.Tensor, tau: float) -> None:
+    target.mul_(1.0 - tau).add_(source, alpha=tau)
+
+
+# Parameter lists keyed on the module they belong to, entries go away with
+# the module. Assumes a module's parameters are not replaced once created.
+_param_cache = WeakKeyDictionary()
+
+
+def get_param_list(model):
+    """Returns the cached list of model.parameters()."""
+    params = _param_cache.get(model)
+    if params is None:
+        params = _param_cache[model] = list(model.parameters())
+    return params
+
+
+def count_parameters(model):
+    return sum(p.numel() for p in get_param_list(model))
+
+
 def soft_update(source, target, tau):
-    target_params = target.parameters()
-    source_params = source.parameters()
-    for target_param, source_param in zip(target_params, source_params):
-        new_param = (target_param.data * (1.0 - tau)
-                     + source_param.data * tau)
-        target_param.data.copy_(new_param)
+    soft_update_many([(source, target)], tau)
+
+
+def soft_update_many(pairs, tau):
+    """
+    Polyak update of several target networks at once.
+    :param pairs: List of (source, target) module pairs.
+    :param tau: Interpolation factor towards the source.
+    """
+    # The parameters of every pair are flattened so that on CUDA the whole
+    # update is a single fused multi-tensor lerp, on CPU each parameter is
+    # updated in place by a scripted kernel.
+    target_params = []
+    source_params = []
+    for source, target in pairs:
+        target_params.extend(get_param_list(target))
+        source_params.extend(get_param_list(source))
+    with torch.no_grad():
+        if target_params[0].is_cuda:
+            if hasattr(torch, "_foreach_lerp_"):
+                torch._foreach_lerp_(target_params, source_params, tau)
+            else:
+                # _foreach_lerp_ is missing from older releases like 1.7
+                torch._foreach_mul_(target_params, 1.0 - tau)
+                torch._foreach_add_(target_params, source_params, alpha=tau)
+        else:
+            for target_param, source_param in zip(target_params, source_params):
+                _polyak(target_param, source_param, tau)
 
 
 def add_prefix(log_dict: OrderedDict, prefix: str, divider=''):
@@ -99,12 +282,42 @@ def add_prefix(log_dict: OrderedDict, prefix: str, divider=''):
     return with_prefix
 
 
-def _filter_batch(batch):
-    for k, v in batch.items():
-        if v.dtype == np.bool:
-            yield k, v.astype(int)
-        else:
-            yield k, v
+if numba is not None:
+    @numba.njit(cache=True)
+    def _welford_stats(data):
+        # Mean, std, max and min of a flat float64 array in a single pass,
+        # the variance is accumulated with Welford's algorithm.
+        mean = 0.0
+        m2 = 0.0
+        hi = data[0]
+        lo = data[0]
+        for i in range(data.size):
+            x = data[i]
+            delta = x - mean
+            mean += delta / (i + 1)
+            m2 += delta * (x - mean)
+            if x > hi:
+                hi = x
+            if x < lo:
+                lo = x
+        return mean, np.sqrt(m2 / data.size), hi, lo
+else:
+    _welford_stats = None
+
+
+def _fused_stats(data):
+    """Returns mean, std, max and min of a flat float64 array."""
+    if data.size == 1:
+        # Not worth dispatching to a kernel for a single value
+        value = data[0]
+        return value, 0.0, value, value
+    if _welford_stats is None:
+        return np.mean(data), np.std(data), np.max(data), np.min(data)
+    return _welford_stats(data)
+
+
+def _is_object_array(x):
+    return isinstance(x, np.ndarray) and x.dtype == np.dtype('O')
 
 
 def create_stats_ordered_dict(
@@ -145,13 +358,14 @@ def create_stats_ordered_dict(
             and not always_show_all_stats):
         return OrderedDict({name: float(data)})
 
+    mean, std, hi, lo = _fused_stats(np.asarray(data, dtype=np.float64).ravel())
     stats = OrderedDict([
-        (name + ' Mean', np.mean(data)),
-        (name + ' Std', np.std(data)),
+        (name + ' Mean', mean),
+        (name + ' Std', std),
     ])
     if not exclude_max_min:
-        stats[name + ' Max'] = np.max(data)
-        stats[name + ' Min'] = np.min(data)
+        stats[name + ' Max'] = hi
+        stats[name + ' Min'] = lo
     return stats
 
 
@@ -186,6 +400,8 @@ def setup_logger(
     :param script_name: If set, save the script name to this.
     :return:
     """
+    from drl_algos.utils.logging import logger
+
     first_time = log_dir is None
     if first_time:
         log_dir = create_log_dir(exp_prefix, **create_log_dir_kwargs)
@@ -257,6 +473,9 @@ def create_exp_name(exp_prefix, exp_id=0, seed=0):
     :param exp_id:
     :return:
     """
+    import datetime
+    import dateutil.tz
+
     now = datetime.datetime.now(dateutil.tz.tzlocal())
     timestamp = now.strftime('%Y_%m_%d_%H_%M_%S')
     return "%s_%s_%04d--s-%d" % (exp_prefix, timestamp, exp_id, seed)
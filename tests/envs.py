@@ -0,0 +1,34 @@
+import gym
+import numpy as np
+from gym.spaces import Box
+
+
+class CounterEnv(gym.Env):
+    """Never terminating env whose observation counts the steps taken."""
+
+    observation_space = Box(-np.inf, np.inf, (1,), dtype=np.float32)
+    action_space = Box(-1, 1, (1,), dtype=np.float32)
+
+    def reset(self):
+        self.t = 0
+        return np.array([self.t], dtype=np.float32)
+
+    def step(self, action):
+        self.t += 1
+        return np.array([self.t], dtype=np.float32), float(self.t), False, {}
+
+
+def make_path(path_len):
+    return dict(
+        observations=np.arange(path_len, dtype=np.float32).reshape(-1, 1),
+        actions=np.full((path_len, 1), 0.5),
+        rewards=np.ones((path_len, 1)),
+        next_observations=np.arange(1, path_len + 1, dtype=np.float32).reshape(-1, 1),
+        terminals=np.zeros((path_len, 1), dtype=bool),
+        agent_infos=[{} for _ in range(path_len)],
+        env_infos=[{} for _ in range(path_len)],
+    )
+
+
+def make_vector_env(num_envs=2):
+    return gym.vector.SyncVectorEnv([lambda: CounterEnv() for _ in range(num_envs)])
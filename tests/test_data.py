@@ -0,0 +1,93 @@
+import pickle
+
+import numpy as np
+import torch
+
+from drl_algos.data import ReplayBuffer, MdpPathCollector
+from drl_algos.data.rollouts import vec_rollout
+from tests.envs import CounterEnv, make_path, make_vector_env
+
+
+class ZeroPolicy(object):
+
+    def get_actions(self, obs):
+        return np.zeros((len(obs), 1), dtype=np.float32), {}
+
+    def reset(self):
+        pass
+
+
+def test_device_replay_buffer_round_trip():
+    env = CounterEnv()
+    host_buffer = ReplayBuffer(10, env)
+    device_buffer = ReplayBuffer(10, env, device="cpu")
+    for buffer in (host_buffer, device_buffer):
+        buffer.add_path(make_path(6))
+        buffer.add_path(make_path(6))
+
+    assert device_buffer.num_steps_can_sample() == host_buffer.num_steps_can_sample() == 10
+
+    host_batch = host_buffer.random_batch(4)
+    device_batch = device_buffer.random_batch(4)
+    assert set(device_batch.keys()) == set(host_batch.keys())
+    for key, value in device_batch.items():
+        assert isinstance(value, torch.Tensor)
+        assert tuple(value.shape) == host_batch[key].shape
+
+    # The second path wrapped around the end of the buffer
+    assert torch.equal(
+        device_buffer._observations[:, 0],
+        torch.tensor([4., 5., 2., 3., 4., 5., 0., 1., 2., 3.]),
+    )
+    assert np.array_equal(host_buffer._observations[:, 0], device_buffer._observations[:, 0].numpy())
+
+
+def test_device_replay_buffer_add_sample_matches_add_path():
+    env = CounterEnv()
+    path = make_path(4)
+    by_path = ReplayBuffer(10, env, device="cpu")
+    by_path.add_path(path)
+    by_sample = ReplayBuffer(10, env, device="cpu")
+    for i in range(4):
+        by_sample.add_sample(
+            observation=path["observations"][i],
+            action=path["actions"][i],
+            reward=path["rewards"][i],
+            next_observation=path["next_observations"][i],
+            terminal=path["terminals"][i],
+            env_info=path["env_infos"][i],
+        )
+    assert torch.equal(by_path._data, by_sample._data)
+    assert by_path._top == by_sample._top == 4
+
+
+def test_device_replay_buffer_sample_without_replacement():
+    buffer = ReplayBuffer(10, CounterEnv(), replace=False, device="cpu")
+    buffer.add_path(make_path(8))
+    batch = buffer.random_batch(8)
+    assert sorted(batch["observations"][:, 0].tolist()) == list(range(8))
+
+
+def test_vec_rollout_returns_a_path_per_env():
+    paths = vec_rollout(make_vector_env(2), ZeroPolicy(), max_path_length=5)
+    assert len(paths) == 2
+    for path in paths:
+        assert path['observations'].shape == (5, 1)
+        assert path['actions'].shape == (5, 1)
+        assert path['rewards'].shape == (5, 1)
+        assert path['terminals'].shape == (5, 1)
+        assert np.array_equal(path['observations'][:, 0], np.arange(5))
+        assert np.array_equal(path['next_observations'][:, 0], np.arange(1, 6))
+
+
+def test_vector_path_collector_trims_overshoot():
+    collector = MdpPathCollector(make_vector_env(2), ZeroPolicy())
+    paths = collector.collect_new_paths(10, 7, discard_incomplete_paths=False)
+    # Both sub-environments take 4 steps, the second path is cut to 3
+    assert [len(path['actions']) for path in paths] == [4, 3]
+    for path in paths:
+        assert all(len(v) == len(path['actions']) for v in path.values())
+
+    snapshot = collector.get_snapshot()
+    assert 'env' not in snapshot
+    pickle.dumps(snapshot)
@@ -0,0 +1,59 @@
+import copy
+import io
+
+import numpy as np
+import torch
+
+from drl_algos.networks import CompiledPolicy, FeedForwardGaussianPolicy, FeedForwardQ
+from drl_algos.utils.distributions import TanhNormal
+
+
+def make_compiled_policy():
+    torch.manual_seed(0)
+    policy = FeedForwardGaussianPolicy((1,), (1,), TanhNormal, layers=(8, 8))
+    return CompiledPolicy(policy)
+
+
+def test_compiled_policy_state_dict_keys():
+    compiled = make_compiled_policy()
+    keys = list(compiled.state_dict().keys())
+    assert keys == ['_policy.' + key for key in compiled._policy.state_dict().keys()]
+
+
+def test_compiled_policy_pickles_after_forward():
+    compiled = make_compiled_policy()
+    obs = torch.ones(2, 1)
+    expected = compiled(obs).mle_estimate()
+
+    buffer = io.BytesIO()
+    torch.save(compiled, buffer)
+    buffer.seek(0)
+    restored = torch.load(buffer)
+
+    assert restored._compiled_forward is None
+    assert torch.allclose(restored(obs).mle_estimate(), expected)
+
+
+def test_compiled_policy_deepcopy_is_independent():
+    compiled = make_compiled_policy()
+    obs = torch.ones(2, 1)
+    expected = compiled(obs).mle_estimate()
+
+    copied = copy.deepcopy(compiled)
+    for param, copied_param in zip(compiled.parameters(), copied.parameters()):
+        assert param is not copied_param
+    with torch.no_grad():
+        copied._policy.fc_mean.bias.fill_(1.0)
+
+    assert torch.allclose(compiled(obs).mle_estimate(), expected)
+    assert not torch.allclose(copied(obs).mle_estimate(), expected)
+
+
+def test_q_accepts_numpy_and_tensor_inputs():
+    qf = FeedForwardQ((2,), (1,), layers=(8, 8))
+    obs = np.ones((3, 2), dtype=np.float32)
+    actions = np.zeros((3, 1), dtype=np.float32)
+    expected = qf(torch.from_numpy(obs), torch.from_numpy(actions))
+    assert expected.shape == (3, 1)
+    assert torch.allclose(qf(obs, actions), expected)
+    assert torch.allclose(qf(obs, torch.from_numpy(actions)), expected)
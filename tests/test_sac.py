@@ -0,0 +1,34 @@
+import pytest
+import torch.optim as optim
+
+from drl_algos.algos import SAC
+from drl_algos.networks import FeedForwardGaussianPolicy, FeedForwardQ
+from drl_algos.utils.distributions import TanhNormal
+from tests.envs import CounterEnv
+
+
+class NonCapturableAdam(optim.Adam):
+
+    def __init__(self, params, lr=1e-3):
+        super().__init__(params, lr=lr)
+
+
+def make_sac(**kwargs):
+    policy = FeedForwardGaussianPolicy((1,), (1,), TanhNormal, layers=(8, 8))
+    qfs = [FeedForwardQ((1,), (1,), layers=(8, 8)) for _ in range(4)]
+    return SAC(CounterEnv(), policy, *qfs, **kwargs)
+
+
+def test_cuda_graph_requires_capturable_optimizer():
+    with pytest.raises(ValueError, match="capturable"):
+        make_sac(use_cuda_graph=True, optimizer_class=NonCapturableAdam)
+
+
+def test_cuda_graph_rejects_mixed_precision():
+    with pytest.raises(ValueError, match="mixed_precision"):
+        make_sac(use_cuda_graph=True, mixed_precision=True)
+
+
+def test_cuda_graph_rejects_target_update_period():
+    with pytest.raises(ValueError, match="target_update_period"):
+        make_sac(use_cuda_graph=True, target_update_period=2)
@@ -0,0 +1,96 @@
+import gtimer as gt
+import numpy as np
+import pytest
+import torch
+
+from drl_algos.algos import SAC
+from drl_algos.data import ReplayBuffer, MdpPathCollector
+from drl_algos.networks import FeedForwardGaussianPolicy, FeedForwardQ, DeterministicPolicy
+from drl_algos.trainers.trainer import BatchRLAlgorithm
+from drl_algos.utils.distributions import TanhNormal
+from drl_algos.utils.logging import logger
+from tests.envs import CounterEnv, make_vector_env
+
+
+def make_algorithm(env):
+    policy = FeedForwardGaussianPolicy((1,), (1,), TanhNormal, layers=(8, 8))
+    qfs = [FeedForwardQ((1,), (1,), layers=(8, 8)) for _ in range(4)]
+    return SAC(env, policy, *qfs)
+
+
+def make_trainer(async_exploration=False, buffer_device=None, expl_env=None,
+                 algorithm=None):
+    expl_env = CounterEnv() if expl_env is None else expl_env
+    eval_env = CounterEnv()
+    algorithm = make_algorithm(eval_env) if algorithm is None else algorithm
+    policy = algorithm.policy
+    return BatchRLAlgorithm(
+        algorithm=algorithm,
+        exploration_env=expl_env,
+        evaluation_env=eval_env,
+        exploration_path_collector=MdpPathCollector(expl_env, policy),
+        evaluation_path_collector=MdpPathCollector(eval_env, DeterministicPolicy(policy)),
+        replay_buffer=ReplayBuffer(100, expl_env, device=buffer_device),
+        batch_size=4,
+        max_path_length=10,
+        num_epochs=2,
+        num_eval_steps_per_epoch=10,
+        num_expl_steps_per_train_loop=20,
+        num_trains_per_train_loop=5,
+        min_num_steps_before_training=10,
+        async_exploration=async_exploration,
+        policy_sync_period=2,
+    )
+
+
+def run_trainer(trainer, tmp_path):
+    gt.reset_root()
+    logger.set_snapshot_dir(str(tmp_path))
+    logger.set_snapshot_mode('last')
+    trainer.train()
+    return torch.load(str(tmp_path / 'params.pkl'))
+
+
+@pytest.mark.parametrize('async_exploration', [False, True])
+@pytest.mark.parametrize('buffer_device', [None, 'cpu'])
+def test_batch_rl_algorithm_trains(tmp_path, async_exploration, buffer_device):
+    trainer = make_trainer(async_exploration, buffer_device)
+    snapshot = run_trainer(trainer, tmp_path)
+
+    # Initial steps plus two epochs of exploration
+    assert trainer.replay_buffer.num_steps_can_sample() == 10 + 2 * 20
+    assert trainer.algo._n_train_steps_total == 2 * 5
+    # The trained policy is saved, not the async worker's copy
+    assert isinstance(snapshot['exploration/policy'], FeedForwardGaussianPolicy)
+
+
+@pytest.mark.parametrize('async_exploration', [False, True])
+def test_batch_rl_algorithm_trains_on_vector_env(tmp_path, async_exploration):
+    trainer = make_trainer(async_exploration, expl_env=make_vector_env(2))
+    snapshot = run_trainer(trainer, tmp_path)
+
+    assert trainer.replay_buffer.num_steps_can_sample() == 10 + 2 * 20
+    assert 'exploration/env' not in snapshot
+
+
+def test_async_exploration_syncs_within_a_path():
+    trainer = make_trainer(async_exploration=True)
+    trainer._init_async_exploration()
+    with torch.no_grad():
+        for param in trainer.algo.policy.parameters():
+            param.fill_(0.5)
+    trainer._publish_policy()
+
+    # The worker's copy loads the published weights before its next action
+    trainer.expl_path_collector._policy.get_action(np.zeros(1, dtype=np.float32))
+    for param in trainer._expl_policy.parameters():
+        assert torch.all(param == 0.5)
+    assert trainer._pending_policy_state is None
+
+
+def test_async_exploration_rejects_cuda_graph():
+    algorithm = make_algorithm(CounterEnv())
+    # Set after construction so the check runs without a capturable optimizer
+    algorithm.use_cuda_graph = True
+    with pytest.raises(ValueError):
+        make_trainer(async_exploration=True, algorithm=algorithm)
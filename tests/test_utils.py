@@ -0,0 +1,176 @@
+import copy
+import threading
+
+import numpy as np
+import pytest
+import torch
+from torch import nn
+
+from drl_algos.utils import utils
+
+
+def test_soft_update_many_matches_loop():
+    torch.manual_seed(0)
+    sources = [nn.Linear(3, 4), nn.Linear(4, 2)]
+    targets = [nn.Linear(3, 4), nn.Linear(4, 2)]
+    tau = 0.1
+
+    expected = []
+    for source, target in zip(sources, targets):
+        expected.append([
+            target_param.data * (1.0 - tau) + source_param.data * tau
+            for target_param, source_param in zip(target.parameters(), source.parameters())
+        ])
+
+    utils.soft_update_many(list(zip(sources, targets)), tau)
+
+    for target, expected_params in zip(targets, expected):
+        for param, expected_param in zip(target.parameters(), expected_params):
+            assert torch.allclose(param, expected_param)
+
+
+def test_soft_update_single_pair():
+    source = nn.Linear(3, 4)
+    target = copy.deepcopy(source)
+    with torch.no_grad():
+        for param in target.parameters():
+            param.zero_()
+
+    utils.soft_update(source, target, 1.0)
+
+    for param, source_param in zip(target.parameters(), source.parameters()):
+        assert torch.allclose(param, source_param)
+
+
+def test_pinned_cache_is_per_thread():
+    caches = []
+    thread = threading.Thread(target=lambda: caches.append(utils._get_pinned_cache()))
+    thread.start()
+    thread.join()
+    assert caches[0] is not utils._get_pinned_cache()
+    assert utils._get_pinned_cache() is utils._get_pinned_cache()
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="requires CUDA")
+def test_pinned_cache_is_bounded():
+    for size in range(1, utils.PINNED_CACHE_SIZE + 5):
+        tensor = utils.to_tensor(np.ones((size, 3)), "cuda")
+        assert torch.equal(tensor.cpu(), torch.ones(size, 3))
+    cache = utils._get_pinned_cache()
+    assert len(cache) == utils.PINNED_CACHE_SIZE
+    # Most recently used shapes are kept
+    assert (utils.PINNED_CACHE_SIZE + 4, 3) in cache
+    assert (1, 3) not in cache
+
+
+def test_to_tensor_batch_columns_and_cache():
+    infos = np.empty(4, dtype=object)
+    infos[:] = [{} for _ in range(4)]
+    batch = dict(
+        rewards=np.arange(4, dtype=np.float64).reshape(4, 1),
+        terminals=np.array([[True], [False], [True], [False]]),
+        infos=infos,
+        actions=np.ones((4, 2)),
+    )
+
+    tensors = utils.to_tensor_batch(batch)
+    num_converters = len(utils._schema_cache)
+
+    assert set(tensors.keys()) == {'rewards', 'terminals', 'actions'}
+    for tensor in tensors.values():
+        assert tensor.dtype == torch.float32
+    assert torch.equal(tensors['terminals'], torch.tensor([[1.], [0.], [1.], [0.]]))
+    assert torch.equal(tensors['rewards'], torch.arange(4.).view(4, 1))
+    assert torch.equal(tensors['actions'], torch.ones(4, 2))
+
+    # Same schema, the cached converter is reused
+    tensors = utils.to_tensor_batch(batch)
+    assert len(utils._schema_cache) == num_converters
+    assert set(tensors.keys()) == {'rewards', 'terminals', 'actions'}
+
+
+def test_to_tensor_batch_tensor_columns():
+    host_batch = dict(obs=np.zeros((2, 3)), done=np.zeros((2, 1), dtype=bool))
+    tensor_batch = dict(
+        obs=torch.ones(2, 3, dtype=torch.float64),
+        done=torch.ones(2, 1),
+    )
+    utils.to_tensor_batch(host_batch)
+    tensors = utils.to_tensor_batch(tensor_batch)
+    # Same keys as the host batch but tensors, so a separate converter
+    assert tensors['obs'].dtype == torch.float32
+    assert torch.equal(tensors['obs'], torch.ones(2, 3))
+    assert tensors['done'] is tensor_batch['done']
+
+
+def test_to_tensor_batch_non_dict():
+    tensor = utils.to_tensor_batch(np.zeros((2, 3)))
+    assert tensor.shape == (2, 3)
+    assert tensor.dtype == torch.float32
+
+
+def test_get_param_list_is_cached():
+    model = nn.Sequential(nn.Linear(3, 4), nn.ReLU(), nn.Linear(4, 2))
+    params = utils.get_param_list(model)
+    assert params is utils.get_param_list(model)
+    assert len(params) == 4
+    for param, expected in zip(params, model.parameters()):
+        assert param is expected
+
+
+def test_count_parameters():
+    assert utils.count_parameters(nn.Linear(3, 4)) == 3 * 4 + 4
+    model = nn.Sequential(nn.Linear(3, 4), nn.Linear(4, 2))
+    assert utils.count_parameters(model) == 16 + 10
+
+
+def test_fused_stats_matches_numpy():
+    data = np.random.RandomState(0).randn(100)
+    mean, std, hi, lo = utils._fused_stats(data)
+    assert np.isclose(mean, np.mean(data))
+    assert np.isclose(std, np.std(data))
+    assert hi == np.max(data)
+    assert lo == np.min(data)
+
+
+def test_fused_stats_single_value():
+    assert utils._fused_stats(np.array([2.5])) == (2.5, 0.0, 2.5, 2.5)
+
+
+def test_create_stats_ordered_dict():
+    stats = utils.create_stats_ordered_dict('x', [np.ones(2), np.zeros(2)])
+    assert list(stats.keys()) == ['x Mean', 'x Std', 'x Max', 'x Min']
+    assert np.isclose(stats['x Mean'], 0.5)
+    assert np.isclose(stats['x Std'], 0.5)
+    assert stats['x Max'] == 1.0
+    assert stats['x Min'] == 0.0
+
+    stats = utils.create_stats_ordered_dict(
+        'x', np.array([3.0]), always_show_all_stats=False)
+    assert stats == {'x': 3.0}
+
+    stats = utils.create_stats_ordered_dict(
+        'x', np.arange(3), stat_prefix='p/', exclude_max_min=True)
+    assert list(stats.keys()) == ['p/x Mean', 'p/x Std']
+
+
+def test_to_numpy_tuple():
+    result = utils.to_numpy((torch.ones(2), np.zeros(3), 1.5))
+    assert isinstance(result, tuple)
+    assert isinstance(result[0], np.ndarray)
+    assert np.array_equal(result[0], np.ones(2))
+    assert np.array_equal(result[1], np.zeros(3))
+    assert result[2] == 1.5
+
+
+def test_to_numpy_detaches():
+    tensor = torch.ones(2, requires_grad=True)
+    result, = utils.to_numpy((tensor * 2,))
+    assert np.array_equal(result, np.full(2, 2.0))
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="requires CUDA")
+def test_to_numpy_cuda_tuple():
+    result = utils.to_numpy((torch.ones(2, device="cuda"), torch.arange(3)))
+    assert np.array_equal(result[0], np.ones(2))
+    assert np.array_equal(result[1], np.arange(3))